@@ -0,0 +1,369 @@
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+"""
+时间/空间维度的情感聚合（全部为向量化的 NumPy/pandas 运算）
+
+输入: Sent_ana.ipynb 输出的CSV（如 data/Tennis_sst2.csv）
+  - created_at: Twitter时间字符串 -> created_ts (UTC epoch 秒, Int64)
+  - coordinates: "lat,lng" 字符串 -> lat / lng (float)
+  - bert_sentiment + bert_conf -> bert_sentiment3 (低于阈值记为 NEUTRAL)
+
+输出: 可直接被 Show_data 仪表盘和 src/ 绘图读取的CSV表
+"""
+
+TWITTER_TIME_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+SENTIMENT_LABELS = ["NEGATIVE", "NEUTRAL", "POSITIVE"]
+
+# 默认的比赛参考时间（UTC）
+REFERENCE_TIMES = {
+    "UEFA": "2017-06-03 20:00",
+    "Tennis": "2017-07-16 16:30",
+}
+
+
+def _epoch_seconds(times: pd.Series) -> pd.Series:
+    """Twitter时间字符串 -> UTC epoch 秒 (Int64, 解析失败为 <NA>)"""
+    dt = pd.to_datetime(times, format=TWITTER_TIME_FORMAT, errors="coerce", utc=True)
+    seconds = (dt - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    return seconds.astype("Int64")
+
+
+def add_epoch_columns(
+    df: pd.DataFrame,
+    time_col: str = "created_at",
+    coord_col: str = "coordinates",
+) -> pd.DataFrame:
+    """
+    一次性解析时间和坐标列，添加 created_ts / lat / lng
+
+    Args:
+        df: 包含 created_at 与 coordinates 列的DataFrame
+        time_col: Twitter时间字符串列
+        coord_col: "lat,lng" 格式的坐标列
+
+    Returns:
+        添加了 created_ts (Int64, 解析失败为 <NA>) 和 lat/lng (float, 缺失为 NaN) 的DataFrame
+    """
+    if time_col in df.columns:
+        df["created_ts"] = _epoch_seconds(df[time_col])
+
+    if coord_col in df.columns:
+        parts = (
+            df[coord_col]
+            .astype("string")
+            .str.split(",", n=1, expand=True)
+            .reindex(columns=[0, 1])
+        )
+        df["lat"] = pd.to_numeric(parts[0], errors="coerce").astype("float64")
+        df["lng"] = pd.to_numeric(parts[1], errors="coerce").astype("float64")
+
+    return df
+
+
+def add_sentiment3(
+    df: pd.DataFrame,
+    threshold: float = 0.7,
+    label_col: str = "bert_sentiment",
+    conf_col: str = "bert_conf",
+    out_col: str = "bert_sentiment3",
+) -> pd.DataFrame:
+    """置信度低于阈值的BERT结果记为 NEUTRAL"""
+    df[out_col] = np.where(df[conf_col] < threshold, "NEUTRAL", df[label_col])
+    return df
+
+
+def _reference_epoch(reference_time: str) -> int:
+    """ "2017-07-16 16:30" (UTC) -> epoch 秒"""
+    return pd.Timestamp(reference_time, tz="UTC").value // 10**9
+
+
+def add_gametime_column(
+    df: pd.DataFrame,
+    reference_time: str = REFERENCE_TIMES["Tennis"],
+    ts_col: str = "created_ts",
+    time_col: str = "created_at",
+    out_col: str = "gametime",
+) -> pd.DataFrame:
+    """
+    与参考时间比较，添加 'before' / 'after' 列（时间无法解析的行为空）
+
+    Args:
+        df: DataFrame, 若无 created_ts 列则临时解析 created_at（不添加新列）
+        reference_time: UTC参考时间, 格式 "%Y-%m-%d %H:%M"
+
+    Returns:
+        添加了 gametime 列的DataFrame
+    """
+    if ts_col in df.columns:
+        ts = df[ts_col]
+    else:
+        ts = _epoch_seconds(df[time_col])
+    before = ts.lt(_reference_epoch(reference_time)).fillna(False).to_numpy(bool)
+    label = np.where(before, "before", "after")
+    df[out_col] = pd.Series(label, index=df.index).where(ts.notna())
+    return df
+
+
+def _valid_rows(df: pd.DataFrame, cols: Sequence[str]) -> pd.DataFrame:
+    missing = [c for c in cols if c not in df.columns]
+    if missing:
+        raise KeyError(f"缺少列: {missing}")
+    return df.dropna(subset=list(cols))
+
+
+def _label_table(counts: pd.DataFrame) -> pd.DataFrame:
+    """
+    由 (分组 x 情感标签) 的计数表生成 n_<label> / n_total / share_<label> 列
+    """
+    counts = counts.reindex(
+        columns=counts.columns.union(SENTIMENT_LABELS), fill_value=0
+    )
+    total = counts.sum(axis=1)
+    shares = counts.div(total.replace(0, np.nan), axis=0).fillna(0.0)
+
+    table = counts.add_prefix("n_")
+    table.columns.name = None
+    table["n_total"] = total
+    return table.join(shares.add_prefix("share_"))
+
+
+def _count_by(
+    df: pd.DataFrame, keys: List, sent_col: str
+) -> pd.DataFrame:
+    return df.groupby(keys + [df[sent_col]]).size().unstack(fill_value=0)
+
+
+def time_rollup(
+    df: pd.DataFrame,
+    bucket_seconds: int = 60,
+    window: int = 15,
+    ts_col: str = "created_ts",
+    sent_col: str = "bert_sentiment3",
+) -> pd.DataFrame:
+    """
+    按时间桶（分钟/小时）统计推文数量和情感占比，并计算滑动窗口
+
+    Args:
+        bucket_seconds: 时间桶大小, 60=每分钟, 3600=每小时
+        window: 滑动窗口包含的时间桶数量
+        ts_col: epoch 秒列
+        sent_col: 情感标签列
+
+    Returns:
+        以 bucket_ts (桶起点 epoch 秒) 为索引的表, 空桶补0;
+        n_* / share_* 为单桶统计, roll_n_* / roll_share_* 为窗口统计
+    """
+    d = _valid_rows(df, [ts_col, sent_col])
+    if d.empty:
+        return pd.DataFrame()
+
+    bucket = pd.Series(
+        d[ts_col].to_numpy("int64") // bucket_seconds * bucket_seconds,
+        index=d.index,
+        name="bucket_ts",
+    )
+    counts = _count_by(d, [bucket], sent_col)
+    # 补齐空桶, 使滑动窗口按时间而不是按行计算
+    full_range = np.arange(
+        counts.index.min(), counts.index.max() + bucket_seconds, bucket_seconds
+    )
+    counts = counts.reindex(full_range, fill_value=0)
+    counts.index.name = "bucket_ts"
+
+    rolled = counts.rolling(window, min_periods=1).sum().astype("int64")
+    table = _label_table(counts).join(_label_table(rolled).add_prefix("roll_"))
+    table.insert(
+        0, "bucket_time", pd.to_datetime(table.index, unit="s", utc=True)
+    )
+    return table
+
+
+def event_split(
+    df: pd.DataFrame,
+    reference_times: Sequence[str],
+    ts_col: str = "created_ts",
+    sent_col: str = "bert_sentiment3",
+) -> pd.DataFrame:
+    """
+    对每个参考时间统计赛前/赛后的情感数量与占比
+
+    Args:
+        reference_times: UTC参考时间列表, 格式 "%Y-%m-%d %H:%M"
+
+    Returns:
+        以 (reference_time, gametime) 为索引的表
+    """
+    d = _valid_rows(df, [ts_col, sent_col])
+    ts = d[ts_col].to_numpy("int64")
+    refs = np.array([_reference_epoch(t) for t in reference_times], dtype="int64")
+
+    # (行 x 参考时间) 的布尔矩阵, 一次比较得到所有切分
+    before = ts[:, None] < refs[None, :]
+    long = pd.DataFrame(
+        {
+            "reference_time": np.tile(np.asarray(reference_times, dtype=object), len(d)),
+            "gametime": np.where(before.ravel(), "before", "after"),
+            sent_col: np.repeat(d[sent_col].to_numpy(), len(refs)),
+        }
+    )
+    counts = _count_by(long, ["reference_time", "gametime"], sent_col)
+    # 没有推文的切分也保留一行（计数为0）
+    counts = counts.reindex(
+        pd.MultiIndex.from_product(
+            [list(reference_times), ["before", "after"]],
+            names=["reference_time", "gametime"],
+        ),
+        fill_value=0,
+    )
+    return _label_table(counts)
+
+
+def grid_rollup(
+    df: pd.DataFrame,
+    cell_size: float = 0.5,
+    lat_col: str = "lat",
+    lng_col: str = "lng",
+    sent_col: str = "bert_sentiment3",
+) -> pd.DataFrame:
+    """
+    按经纬度网格统计情感
+
+    Args:
+        cell_size: 网格边长（度）
+
+    Returns:
+        以网格西南角 (cell_lat, cell_lng) 为索引的表
+    """
+    d = _valid_rows(df, [lat_col, lng_col, sent_col])
+    cell_lat = pd.Series(
+        np.floor(d[lat_col].to_numpy() / cell_size) * cell_size,
+        index=d.index,
+        name="cell_lat",
+    )
+    cell_lng = pd.Series(
+        np.floor(d[lng_col].to_numpy() / cell_size) * cell_size,
+        index=d.index,
+        name="cell_lng",
+    )
+    return _label_table(_count_by(d, [cell_lat, cell_lng], sent_col))
+
+
+def country_rollup(
+    df: pd.DataFrame,
+    country_col: str = "country_code",
+    sent_col: str = "bert_sentiment3",
+) -> pd.DataFrame:
+    """按国家（或任意地区列）统计情感"""
+    d = _valid_rows(df, [country_col, sent_col])
+    return _label_table(_count_by(d, [country_col], sent_col))
+
+
+def build_cache(
+    input_file,
+    output_dir,
+    reference_times: Sequence[str] = (REFERENCE_TIMES["Tennis"],),
+    threshold: float = 0.7,
+    window: int = 15,
+    hour_window: int = 6,
+    cell_size: float = 0.5,
+    country_col: str = "country_code",
+    force: bool = False,
+) -> Dict[str, Path]:
+    """
+    计算所有聚合表并缓存为CSV；输入文件和参数未变化时直接返回已有结果
+
+    Args:
+        input_file: 情感分析后的CSV
+        output_dir: 输出目录, 文件名为 <输入文件名>_<表名>.csv
+        window: 分钟表的滑动窗口（分钟数）
+        hour_window: 小时表的滑动窗口（小时数）
+        force: 忽略缓存强制重新计算
+
+    Returns:
+        {表名: 文件路径}
+    """
+    input_file = Path(input_file)
+    output_dir = Path(output_dir)
+    stem = input_file.stem
+    meta_file = output_dir / f"{stem}_meta.json"
+
+    params = {
+        "input_file": str(input_file.resolve()),
+        "input_mtime": input_file.stat().st_mtime,
+        "input_size": input_file.stat().st_size,
+        "reference_times": list(reference_times),
+        "threshold": threshold,
+        "window": window,
+        "hour_window": hour_window,
+        "cell_size": cell_size,
+        "country_col": country_col,
+    }
+
+    if not force and meta_file.exists():
+        meta = json.loads(meta_file.read_text(encoding="utf-8"))
+        outputs = {name: Path(p) for name, p in meta.get("outputs", {}).items()}
+        if meta.get("params") == params and all(p.exists() for p in outputs.values()):
+            print(f"使用缓存: {meta_file}")
+            return outputs
+
+    df = pd.read_csv(input_file)
+    add_epoch_columns(df)
+    add_sentiment3(df, threshold)
+
+    tables = {
+        "minute": time_rollup(df, 60, window),
+        "hour": time_rollup(df, 3600, hour_window),
+        "event_split": event_split(df, reference_times),
+        "grid": grid_rollup(df, cell_size),
+    }
+    if country_col in df.columns:
+        tables["country"] = country_rollup(df, country_col)
+    else:
+        print(f"跳过国家统计: 输入文件中没有 {country_col} 列")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    outputs = {}
+    for name, table in tables.items():
+        path = output_dir / f"{stem}_{name}.csv"
+        table.to_csv(path, encoding="utf-8")
+        outputs[name] = path
+
+    meta_file.write_text(
+        json.dumps(
+            {"params": params, "outputs": {k: str(v) for k, v in outputs.items()}},
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    return outputs
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("用法: python aggregate.py <输入CSV文件> <输出目录> [参考时间 ...]")
+        print(
+            '示例: python aggregate.py data/Tennis_sst2.csv ../src/agg "2017-07-16 16:30"'
+        )
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    output_dir = sys.argv[2]
+    reference_times = sys.argv[3:] or [REFERENCE_TIMES["Tennis"]]
+
+    if not Path(input_file).exists():
+        print(f"错误: 输入文件 '{input_file}' 不存在")
+        sys.exit(1)
+
+    outputs = build_cache(input_file, output_dir, reference_times)
+    for name, path in outputs.items():
+        print(f"{name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
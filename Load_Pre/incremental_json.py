@@ -0,0 +1,320 @@
+import codecs
+import csv
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from read_Large_json import TwitterProcessor
+
+"""
+增量处理正在追加写入的推文文件（当天的dump）
+
+每次运行只解析上次处理位置之后新追加的对象，并追加到输出CSV:
+1、状态文件记录: 已处理的字节位置、计数、已写入推文的id（去重）、输出CSV的字节位置
+2、支持JSON数组（可未闭合）和JSONL两种格式
+3、文件末尾写了一半的对象不会被处理，下次运行时再从该对象开头解析；
+   中间损坏的对象会被跳过并计入 error_count
+4、传入轮询间隔时持续监视文件
+
+用法: python incremental_json.py <输入JSON文件> <输出CSV文件> <状态文件> [轮询间隔秒数]
+"""
+
+READ_CHUNK_SIZE = 64 * 1024 * 1024
+SEPARATORS = " \t\r\n,[]"
+# 损坏对象之后可能的下一个对象开头: 逗号或换行之后的 "{"
+OBJECT_START = re.compile(r"[,\n]\s*\{")
+# 在末尾被截断的单个值: true/false/null/NaN/Infinity 的前缀、写了一半的数字或 \uXXXX 转义
+TRUNCATED_TOKEN = re.compile(
+    r"t(r(ue?)?)?|f(a(l(se?)?)?)?|n(u(ll?)?)?|N(aN?)?"
+    r"|-?(I(n(f(i(n(i(ty?)?)?)?)?)?)?)?"
+    r"|-?\d*(\.\d*)?([eE][+-]?\d*)?"
+    r"|u[0-9a-fA-F]{0,3}"
+)
+
+
+class IncrementalTwitterProcessor(TwitterProcessor):
+    def __init__(self, input_file, output_file, state_file, **kwargs):
+        output_file = Path(output_file)
+        super().__init__(input_file, output_file, **kwargs)
+        self.state_file = Path(state_file)
+        self.decoder = json.JSONDecoder()
+        self.offset = 0
+        self.output_position = 0
+        self.error_count = 0
+        self.duplicate_count = 0
+        self.seen_ids = set()
+        self._load_state()
+
+    def _load_state(self):
+        """读取上次运行保存的状态，没有状态文件时从头开始"""
+        if not self.state_file.exists():
+            return
+        with open(self.state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("input_file") != str(self.input_file):
+            print(f"警告: 状态文件对应的输入文件为 {state.get('input_file')}")
+        self.offset = state["offset"]
+        self.output_position = state["output_position"]
+        self.processed_count = state["processed_count"]
+        self.uk_tweets_count = state["uk_tweets_count"]
+        self.error_count = state.get("error_count", 0)
+        self.duplicate_count = state.get("duplicate_count", 0)
+        self.seen_ids = set(state.get("seen_ids", []))
+
+    def _save_state(self):
+        """先写临时文件再替换，避免中断时留下损坏的状态文件"""
+        state = {
+            "input_file": str(self.input_file),
+            "offset": self.offset,
+            "output_position": self.output_position,
+            "processed_count": self.processed_count,
+            "uk_tweets_count": self.uk_tweets_count,
+            "error_count": self.error_count,
+            "duplicate_count": self.duplicate_count,
+            "seen_ids": list(self.seen_ids),
+        }
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_name(self.state_file.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+
+    def _prepare_output(self):
+        """
+        输出CSV与状态对齐: 上次写入后未保存状态就中断时，截掉多写的行
+
+        Returns:
+            输出文件与状态不一致（被删除或变短）时返回False
+        """
+        if self.offset == 0:
+            self.output_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.output_file, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(self.output_feature)
+            self.output_position = self.output_file.stat().st_size
+            return True
+
+        output_size = (
+            self.output_file.stat().st_size if self.output_file.exists() else -1
+        )
+        if output_size < self.output_position:
+            print(
+                f"错误: 输出文件 {self.output_file} 不存在或比记录的位置短 "
+                f"({output_size:,} < {self.output_position:,} 字节), "
+                f"已写入的推文丢失, 请删除状态文件 {self.state_file} 后重新处理"
+            )
+            return False
+        if output_size > self.output_position:
+            with open(self.output_file, "r+b") as f:
+                f.truncate(self.output_position)
+        return True
+
+    def process_stream(self):
+        """处理上次位置之后追加的数据，返回是否成功"""
+        try:
+            file_size = self.input_file.stat().st_size
+        except FileNotFoundError:
+            print(f"错误: 找不到输入文件 {self.input_file}")
+            return False
+
+        if file_size < self.offset:
+            print(
+                f"错误: 输入文件变小了 ({file_size:,} < {self.offset:,} 字节), "
+                f"文件可能被替换, 请删除状态文件 {self.state_file} 后重新处理"
+            )
+            return False
+        if file_size == self.offset:
+            return True
+
+        start_offset = self.offset
+        start_count = self.processed_count
+        start_matched = self.uk_tweets_count
+        if not self._prepare_output():
+            return False
+
+        try:
+            with open(self.input_file, "rb") as input_f, open(
+                self.output_file, "a", newline="", encoding="utf-8"
+            ) as output_f:
+                csv_writer = csv.writer(output_f)
+                input_f.seek(self.offset)
+                utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+                pending = ""
+
+                while True:
+                    chunk = input_f.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    pending += utf8_decoder.decode(chunk)
+                    consumed = self._process_text(pending, csv_writer)
+                    # 只推进到最后一个完整对象之后
+                    self.offset += len(pending[:consumed].encode("utf-8"))
+                    pending = pending[consumed:]
+
+                    output_f.flush()
+                    self.output_position = os.fstat(output_f.fileno()).st_size
+                    self._save_state()
+
+                # 剩下的数据只能是写了一半的对象，否则说明数据损坏且无法恢复
+                self._check_tail(pending)
+
+        except Exception as e:
+            print(f"处理过程中发生错误: {e}")
+            return False
+
+        print(
+            f"新增数据: {self.offset - start_offset:,} 字节, "
+            f"新增记录: {self.processed_count - start_count:,} 条, "
+            f"新增符合条件的推文: {self.uk_tweets_count - start_matched:,} 条 "
+            f"(累计 {self.uk_tweets_count:,} / {self.processed_count:,})"
+        )
+        return True
+
+    def _process_text(self, text, csv_writer):
+        """
+        解析text中所有完整的顶层对象并写入CSV
+
+        Returns:
+            已处理部分的字符数（之后是未完整写入的对象）
+        """
+        pos = 0
+        end = len(text)
+        while True:
+            while pos < end and text[pos] in SEPARATORS:
+                pos += 1
+            if pos >= end:
+                return pos
+            try:
+                tweet, next_pos = self.decoder.raw_decode(text, pos)
+            except json.JSONDecodeError as e:
+                if self._is_truncated(e, text):
+                    # 写了一半的对象，等待更多数据
+                    return pos
+                # 损坏的对象: 跳到下一个对象开头
+                skip_to = self._next_object_start(text, pos)
+                if skip_to is None:
+                    # 下一个对象还没有写入，留到读到更多数据时再处理
+                    return pos
+                self.error_count += 1
+                pos = skip_to
+                continue
+
+            pos = next_pos
+            if isinstance(tweet, dict):
+                self._handle_tweet(tweet, csv_writer)
+
+    @staticmethod
+    def _is_truncated(error, text):
+        """
+        解析错误是否由数据在text末尾中断引起（而不是数据本身损坏）
+
+        除了错误位置就在末尾和未结束的字符串外，写入方也常在字面量
+        （"truncated": fal）、数字（[-）或 \\uXXXX 转义中间被截断，
+        此时错误位置之后到末尾只剩一个不完整的值
+        """
+        if error.pos >= len(text) or error.msg.startswith("Unterminated string"):
+            return True
+        return TRUNCATED_TOKEN.fullmatch(text, error.pos) is not None
+
+    def _next_object_start(self, text, pos):
+        """
+        从损坏对象之后找到下一个推文对象的开头
+
+        Returns:
+            下一个对象的位置; 下一个对象写了一半时也返回其位置; 找不到时返回None
+        """
+        match = OBJECT_START.search(text, pos + 1)
+        while match:
+            start = match.end() - 1
+            try:
+                obj, _ = self.decoder.raw_decode(text, start)
+                # 嵌套在损坏对象里的子对象（如hashtags）没有created_at
+                if isinstance(obj, dict) and "created_at" in obj:
+                    return start
+            except json.JSONDecodeError as e:
+                if self._is_truncated(e, text):
+                    return start
+            match = OBJECT_START.search(text, start + 1)
+        return None
+
+    def _check_tail(self, text):
+        """读到文件末尾后检查剩余数据，损坏时抛出异常而不是一直停在这里"""
+        pos = 0
+        while pos < len(text) and text[pos] in SEPARATORS:
+            pos += 1
+        if pos >= len(text):
+            return
+        try:
+            self.decoder.raw_decode(text, pos)
+        except json.JSONDecodeError as e:
+            if self._is_truncated(e, text):
+                return
+            raise ValueError(
+                f"第 {self.offset:,} 字节之后的数据损坏且无法找到下一个对象: {e}"
+            )
+
+    def _handle_tweet(self, tweet, csv_writer):
+        self.processed_count += 1
+        if not (self._is_time_tweet(tweet) and self._is_topic_tweet(tweet)):
+            return
+
+        # 只记录符合条件的推文id，状态文件大小与输出CSV同量级
+        tweet_id = tweet.get("id_str") or tweet.get("id")
+        if tweet_id is not None:
+            tweet_id = str(tweet_id)
+            if tweet_id in self.seen_ids:
+                self.duplicate_count += 1
+                return
+            self.seen_ids.add(tweet_id)
+
+        self.uk_tweets_count += 1
+        self._write_tweet_to_csv(tweet, csv_writer)
+
+    def watch(self, interval=60):
+        """每隔interval秒检查一次文件是否有新数据，Ctrl+C退出"""
+        print(f"监视文件: {self.input_file} (每 {interval} 秒检查一次)")
+        try:
+            while True:
+                if not self.process_stream():
+                    return False
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\n停止监视")
+        return True
+
+
+def main():
+    if len(sys.argv) not in (4, 5):
+        print(
+            "用法: python incremental_json.py <输入JSON文件> <输出CSV文件> <状态文件> [轮询间隔秒数]"
+        )
+        print(
+            "示例: python incremental_json.py twitter_data.json tennis_tweets.csv tennis_state.json 60"
+        )
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    output_file = sys.argv[2]
+    state_file = sys.argv[3]
+
+    if not Path(input_file).exists():
+        print(f"错误: 输入文件 '{input_file}' 不存在")
+        sys.exit(1)
+
+    processor = IncrementalTwitterProcessor(input_file, output_file, state_file)
+    if len(sys.argv) == 5:
+        success = processor.watch(float(sys.argv[4]))
+    else:
+        success = processor.process_stream()
+
+    if success:
+        print(f"数据已追加到: {output_file}")
+    else:
+        print("处理失败")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
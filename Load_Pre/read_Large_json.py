@@ -37,12 +37,12 @@ class TwitterProcessor:
         self,
         input_file,
         output_file,
-        output_json,
+        output_json=None,
         feature=["coordinates", "location", "text", "created_at", "lang", "hashTags"],
     ):
         self.input_file = Path(input_file)
         self.output_file = Path(output_file)
-        self.output_json = Path(output_json)
+        self.output_json = Path(output_json) if output_json else None
         self.processed_count = 0
         self.uk_tweets_count = 0
         self.output_feature = feature
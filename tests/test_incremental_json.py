@@ -0,0 +1,61 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("ijson")
+sys.path.insert(0, str(Path(__file__).parent.parent / "Load_Pre"))
+
+from incremental_json import IncrementalTwitterProcessor
+
+
+def make_tweet(i):
+    return json.dumps(
+        {
+            "id_str": str(i),
+            "created_at": "Sun Jul 16 15:00:00 +0000 2017",
+            "text": "Federer #Wimbledon",
+            "lang": "en",
+            "truncated": False,
+            "coordinates": [-0.2, 51.4],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "cut_after",
+    ['"truncated": fal', '"coordinates": [-', '"text": "Fed\\u00', '"text": "Fed\\u'],
+)
+def test_trailing_partial_object_waits_for_rest(tmp_path, cut_after):
+    """写了一半的对象（截断在字面量/数字/转义中间）不算损坏，补全后继续处理"""
+    input_file = tmp_path / "dump.json"
+    output_file = tmp_path / "out.csv"
+    state_file = tmp_path / "state.json"
+
+    last = make_tweet(1).replace('"text": "Federer', '"text": "Fed\\u0065derer')
+    cut = last.index(cut_after) + len(cut_after)
+    input_file.write_text("[" + make_tweet(0) + "," + last[:cut], encoding="utf-8")
+
+    processor = IncrementalTwitterProcessor(input_file, output_file, state_file)
+    assert processor.process_stream()
+    assert processor.uk_tweets_count == 1
+    assert processor.error_count == 0
+
+    with open(input_file, "a", encoding="utf-8") as f:
+        f.write(last[cut:] + "," + make_tweet(2))
+
+    processor = IncrementalTwitterProcessor(input_file, output_file, state_file)
+    assert processor.process_stream()
+    assert processor.uk_tweets_count == 3
+    assert processor.error_count == 0
+
+
+def test_corrupt_object_at_end_fails(tmp_path):
+    input_file = tmp_path / "dump.json"
+    input_file.write_text("[" + make_tweet(0) + ',{"truncated": fals, "a": 1}', encoding="utf-8")
+
+    processor = IncrementalTwitterProcessor(
+        input_file, tmp_path / "out.csv", tmp_path / "state.json"
+    )
+    assert not processor.process_stream()